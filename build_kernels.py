@@ -0,0 +1,35 @@
+# build_kernels.py
+"""
+Compilation AOT (numba.pycc) de kernels.model_kernel en module d'extension
+'model_kernels', écrit à côté de ce script.
+À lancer à l'installation, puis à CHAQUE modification de kernels.py : python build_kernels.py
+model.py importe alors model_kernels sans aucun coût de JIT au premier affichage.
+Le module embarque l'empreinte de kernels.py (source_hash) : s'il ne correspond plus
+au fichier courant, kernel_backend l'ignore et retombe sur le JIT (avec un avertissement).
+"""
+import os
+
+from numba.pycc import CC
+
+from kernel_backend import kernels_hash
+from kernels import model_kernel
+
+cc = CC("model_kernels")
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Mêmes types que l'appel dans model.py ; grid : float32 (T+1, 3), flux : float64 (T+1, 4),
+# tous deux en ordre Fortran
+cc.export(
+    "model_kernel",
+    "UniTuple(f8, 3)(f8, f8, f8, f8, f8, f8, f8, f8, i8, f8, f8, f8, f4[::1, :], f8[::1, :])",
+)(model_kernel.py_func)
+
+# Empreinte figée à la compilation, comparée par kernel_backend à celle du kernels.py courant
+BUILT_HASH = kernels_hash()
+
+@cc.export("source_hash", "i8()")
+def source_hash():
+    return BUILT_HASH
+
+if __name__ == "__main__":
+    cc.compile()
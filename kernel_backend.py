@@ -0,0 +1,38 @@
+# kernel_backend.py
+"""
+Choix du noyau du modèle (une seule fois par processus, pas à chaque réexécution Streamlit) :
+module AOT model_kernels s'il a été compilé depuis le kernels.py courant, sinon JIT Numba.
+Le module AOT est à recompiler (python build_kernels.py) à chaque modification de kernels.py.
+"""
+import functools
+import hashlib
+import os
+import warnings
+
+KERNELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kernels.py")
+
+def kernels_hash():
+    """
+    Empreinte de kernels.py : 60 premiers bits du SHA-256 (tient dans un int64 positif).
+    Figée dans model_kernels à la compilation AOT, comparée au fichier courant au chargement.
+    """
+    with open(KERNELS_PATH, "rb") as f:
+        return int(hashlib.sha256(f.read()).hexdigest()[:15], 16)
+
+@functools.lru_cache(maxsize=None)
+def select_kernel():
+    """
+    Retourne model_kernel : celui de model_kernels s'il est à jour, sinon celui de kernels.py
+    (avec un avertissement si model_kernels existe mais provient d'une autre version).
+    """
+    try:
+        import model_kernels
+    except ImportError:
+        model_kernels = None
+    if model_kernels is not None:
+        if model_kernels.source_hash() == kernels_hash():
+            return model_kernels.model_kernel
+        warnings.warn("model_kernels compilé depuis une autre version de kernels.py : "
+                      "JIT utilisé, relancer python build_kernels.py")
+    from kernels import model_kernel
+    return model_kernel
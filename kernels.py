@@ -0,0 +1,112 @@
+# kernels.py
+import math
+
+import numpy as np
+from numba import njit
+
+# Demi-largeur de la fenêtre de transition de la sigmoïde, en |k(t-t0)| : au-delà de 37,
+# la sigmoïde vaut exactement 1 en float64 côté haut (exp(-37) ≈ 8.5e-17 < eps/2), et
+# moins de 1e-16 * l'incrément côté bas (à 17 elle vaut encore ≈ 4e-8, pas 0)
+SAT_ACQ = 37.0
+
+# -----------------------
+# Noyau du modèle (Numba)
+# -----------------------
+@njit(cache=True, fastmath=True)
+def _confidence(x, T, p):
+    """
+    Confiance 'inversée' scalaire : 1 - (x/T)^p pour 0<=x<=T, puis 0.
+    """
+    if x < 0.0 or x > T:
+        return 0.0
+    return 1.0 - (x / T) ** p
+
+@njit(cache=True, fastmath=True)
+def sigmoid_acquisition(t_len, start_t, target_increment, k, half, out):
+    """
+    Acquisition sigmoïde de 0 à target_increment, de pente k, centrée à start_t + half,
+    sur la grille 0..t_len-1 : ajoutée à out (les phases successives se cumulent).
+    """
+    if target_increment <= 0:
+        return
+    t0 = start_t + half
+    # exp n'est évaluée que sur la fenêtre |k(i-t0)| <= SAT_ACQ (bornée à la grille) :
+    # avant, la sigmoïde est négligeable (rien à ajouter) ; après, elle vaut target_increment
+    w = SAT_ACQ / k
+    i_lo = min(max(int(math.ceil(t0 - w)), 0), t_len)
+    i_hi = min(max(int(math.floor(t0 + w)) + 1, i_lo), t_len)
+    for i in range(i_lo, i_hi):
+        out[i] += target_increment / (1.0 + math.exp(-k * (float(i) - t0)))
+    for i in range(i_hi, t_len):
+        out[i] += target_increment
+
+@njit(cache=True, fastmath=True)
+def conf_with_vm(t_len, T, p, vm_month, out):
+    """
+    Confiance effective sur la grille 0..t_len-1, écrite directement dans out :
+    max(base, VM), la relance VM étant ignorée si vm_month < 0.
+    Les mois étant entiers, la relance VM est le profil de base décalé de vm_month :
+    il est calculé une seule fois dans out, puis relu décalé (aucune puissance en plus).
+    """
+    for i in range(t_len):
+        out[i] = _confidence(float(i), T, p)
+    if vm_month >= 0:
+        # Parcours descendant : out[i - vm_month] est encore le profil de base
+        for i in range(t_len - 1, vm_month - 1, -1):
+            out[i] = max(out[i], out[i - vm_month])
+        # Avant la campagne, temps relatif depuis VM ramené à 0 : confiance 1
+        for i in range(min(vm_month, t_len)):
+            out[i] = 1.0
+
+@njit(cache=True, fastmath=True)
+def model_kernel(start1, inc1, start2, inc2, k, half, T_conf, p, vm_month, pot_diag, taux_trait, prix, grid, flux):
+    """
+    Sur la grille 0..T (T+1 = grid.shape[0]) : acquisition sigmoïde (deux phases) via
+    sigmoid_acquisition, confiance inversée (relance VM si vm_month >= 0) via conf_with_vm,
+    puis une seule boucle pour les diagnostics, patients traités, revenu mensuel et cumulé.
+    Écrit mois, médecins et confiance dans grid (float32) ; diagnostics, patients traités,
+    revenu mensuel et revenu cumulé dans flux (float64).
+    Sigmoïde de pente k, centrée à start + half (passées par l'appelant, constantes).
+    Retourne les totaux (diagnostics, patients traités, revenu) cumulés dans la même boucle.
+    """
+    n = grid.shape[0]
+    k_trait = pot_diag * taux_trait
+    k_rev = k_trait * prix
+
+    # Acquisition et confiance calculées en float64 dans les deux premières colonnes
+    # de flux, servant de brouillon : lues puis écrasées mois par mois ci-dessous
+    flux[:, 0] = 0.0
+    sigmoid_acquisition(n, start1, inc1, k, half, flux[:, 0])
+    sigmoid_acquisition(n, start2, inc2, k, half, flux[:, 0])
+    # Confiance effective = max(base, VM)
+    conf_with_vm(n, T_conf, p, vm_month, flux[:, 1])
+
+    acc_diag = 0.0
+    acc_trait = 0.0
+    acc_rev = 0.0
+    for i in range(n):
+        m = flux[i, 0]
+        c = flux[i, 1]
+        mc = m * c  # float64 : les montants ne dépendent pas de l'arrondi float32 de grid
+        d = mc * pot_diag
+        tr = mc * k_trait
+        r = mc * k_rev
+        acc_diag += d
+        acc_trait += tr
+        acc_rev += r
+
+        grid[i, 0] = i
+        grid[i, 1] = m
+        grid[i, 2] = c
+        flux[i, 0] = d
+        flux[i, 1] = tr
+        flux[i, 2] = r
+        flux[i, 3] = acc_rev
+    return acc_diag, acc_trait, acc_rev
+
+# Compilation à l'import (mêmes types que l'appel dans model.py) : la première
+# réexécution Streamlit ne paie pas le coût du JIT.
+model_kernel(
+    0.0, 1.0, 12.0, 0.0, 1.0, 3.0, 10.0, 3.0, -1, 1.0, 1.0, 1.0,
+    np.empty((13, 3), dtype=np.float32, order="F"), np.empty((13, 4), dtype=np.float64, order="F"),
+)
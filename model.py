@@ -1,8 +1,15 @@
 # app.py
+import math
+
 import streamlit as st
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
+import pyarrow as pa
+import altair as alt
+
+from kernel_backend import select_kernel
+
+# Module AOT à jour (python build_kernels.py) sinon JIT Numba : choisi une fois par processus
+model_kernel = select_kernel()
 
 st.set_page_config(page_title="Modèle de gains – Sigmoïde & Confiance inversée", layout="wide")
 
@@ -12,52 +19,126 @@ st.set_page_config(page_title="Modèle de gains – Sigmoïde & Confiance invers
 CONF_T = 10          # la confiance doit atteindre 0 à 10 mois
 CONF_P = 3.0         # exponent 'inversée' (>1 = quasi stable au début, chute forte en fin)
 ACQ_LENGTH = 6       # acquisition sigmoïde vers la cible en 6 mois
+K_ACQ = (2 * math.log(99)) / ACQ_LENGTH  # pente de la sigmoïde (≈1% -> ≈99% en ACQ_LENGTH mois)
 EXTENSION_MONTHS = 12
 COUT_PROJET = 50_000  # coût fixe projet (pour ROI 12 mois)
 
+# Colonnes du tableau mois par mois, en deux blocs de calcul :
+#   - grille (mois, médecins, confiance) en float32 : affichée à 2-3 décimales
+#   - flux (diagnostics, patients, revenus) en float64 : montants exacts au centime
+GRID_COLUMNS = ["Mois", "Médecins acquis", "Confiance c(t)"]
+FLUX_COLUMNS = ["Diagnostics", "Patients traités", "Revenu mensuel (€)", "Revenu cumulé (€)"]
+# Schéma Arrow fixe : aucune inférence de type par réexécution
+TABLE_SCHEMA = pa.schema(
+    [(name, pa.float32()) for name in GRID_COLUMNS]
+    + [(name, pa.float64()) for name in FLUX_COLUMNS]
+)
+
 # -----------------------
 # Helpers
 # -----------------------
-def sigmoid_acquisition(t, start_t, target_increment, length=ACQ_LENGTH):
+_SEP_MILLIERS = str.maketrans(",", " ")
+
+def fmt_milliers(x):
     """
-    Acquisition sigmoïde de 0 à target_increment en 'length' mois, démarrant à start_t.
-    Calibrée pour ≈1% à start_t et ≈99% à start_t+length.
+    Nombre arrondi à l'unité, milliers séparés par une espace (ex. 54 162).
     """
-    t = np.asarray(t, dtype=float)
-    if length <= 0 or target_increment <= 0:
-        return np.zeros_like(t, dtype=float)
-    k = (2 * np.log(99)) / length
-    t0 = start_t + length / 2.0
-    s = 1 / (1 + np.exp(-k * (t - t0)))
-    s = np.clip(s, 0, 1)
-    return target_increment * s
-
-def confidence_inverted_drop(t, T=CONF_T, p=CONF_P):
+    return f"{x:,.0f}".translate(_SEP_MILLIERS)
+
+# -----------------------
+# Modèle (mis en cache)
+# -----------------------
+@st.cache_data(max_entries=256, show_spinner=False)
+def compute_model(prix, nb_med_target, pot_diag, taux_trait_pct, horizon,
+                  vm_month, extension_active, nb_med_new):
+    """
+    Calcule toutes les séries du modèle pour un jeu de paramètres scalaires.
+    Fonction pure : les réexécutions avec les mêmes paramètres sont servies par le cache.
+    Retourne (t, med_t, c_t, diag_t, traites_t, revenu_mensuel, revenu_cumule, table, totaux),
+    totaux = (diagnostics, patients traités, revenu) sur 0..horizon.
+    """
+    # Deux blocs contigus (colonne par colonne) : chaque série est une vue sur l'un d'eux
+    grid = np.empty((horizon + 1, len(GRID_COLUMNS)), dtype=np.float32, order="F")
+    flux = np.empty((horizon + 1, len(FLUX_COLUMNS)), dtype=np.float64, order="F")
+    t, med_t, c_t = grid.T
+    diag_t, traites_t, revenu_mensuel, revenu_cumule = flux.T
+    t_ext_start = 12
+
+    # Acquisition (sigmoïde 6 mois, phase 2 à partir de M=12 si extension), confiance
+    # inversée (relance VM) et revenus fusionnés en une seule boucle compilée (kernels.py)
+    totaux = model_kernel(
+        0.0, float(nb_med_target),
+        float(t_ext_start), float(nb_med_new) if extension_active else 0.0,
+        K_ACQ, ACQ_LENGTH / 2.0, float(CONF_T), float(CONF_P),
+        -1 if vm_month is None else int(vm_month),
+        float(pot_diag), taux_trait_pct / 100.0, float(prix),
+        grid, flux,
+    )
+
+    # Tableau Arrow construit sur les colonnes des deux blocs (contiguës, sans copie) :
+    # st.dataframe le sérialise tel quel, sans passer par pandas
+    table = pa.Table.from_arrays([*grid.T, *flux.T], schema=TABLE_SCHEMA)
+    return t, med_t, c_t, diag_t, traites_t, revenu_mensuel, revenu_cumule, table, totaux
+
+# -----------------------
+# Graphiques (Vega-Lite, rendus côté navigateur)
+# -----------------------
+def line_chart(table, y, title, vlines=(), y_domain=None):
     """
-    Confiance 'inversée' : c(t) = 1 - (t/T)^p pour 0<=t<=T, puis 0.
-    - p > 1 : quasi stable au début, chute accélérée vers la fin.
-    - c(0)=1, c(T)=0.
+    Courbe de la colonne y de table en fonction de "Mois".
+    vlines : tuple de (x, label) tracés en pointillés avec leur libellé.
     """
-    t = np.asarray(t, dtype=float)
-    c = np.zeros_like(t, dtype=float)
-    mask = (t >= 0) & (t <= T)
-    x = t[mask] / float(T)
-    c[mask] = 1.0 - (x ** p)
-    c[t > T] = 0.0
-    return np.clip(c, 0.0, 1.0)
-
-def confidence_with_vm_inverted(t, vm_month=None, T=CONF_T, p=CONF_P):
+    y_kwargs = {"scale": alt.Scale(domain=list(y_domain))} if y_domain is not None else {}
+    chart = alt.Chart(table).mark_line().encode(
+        x=alt.X("Mois:Q", title="Mois"),
+        y=alt.Y(field=y, type="quantitative", title=y, **y_kwargs),
+    )
+    if vlines:
+        rules = alt.Chart(alt.Data(values=[{"Mois": x, "Repère": label} for x, label in vlines])).encode(
+            x="Mois:Q",
+        )
+        chart = (
+            chart
+            + rules.mark_rule(strokeDash=[4, 4], opacity=0.7).encode(tooltip="Repère:N")
+            + rules.mark_text(align="left", baseline="top", dx=4, y=4).encode(text="Repère:N")
+        )
+    return chart.properties(title=title)
+
+def bar_chart(table, y, title):
     """
-    Combine la confiance de base 'inversée' et, si vm_month est fixé,
-    une relance VM avec le même profil sur 10 mois, via max().
+    Barres de la colonne y de table en fonction de "Mois".
     """
-    t = np.asarray(t, dtype=float)
-    c_base = confidence_inverted_drop(t, T=T, p=p)
-    if vm_month is None:
-        return c_base
-    tau = np.maximum(0.0, t - vm_month)  # temps relatif depuis VM
-    c_vm = confidence_inverted_drop(tau, T=T, p=p)
-    return np.maximum(c_base, c_vm)
+    return alt.Chart(table).mark_bar().encode(
+        x=alt.X("Mois:O", title="Mois", axis=alt.Axis(labelAngle=0)),
+        y=alt.Y(field=y, type="quantitative", title=y),
+    ).properties(title=title)
+
+# -----------------------
+# Contrôles VM / extension (fragments)
+#   Un curseur dans un fragment ne réexécute que le fragment ; l'app entière
+#   n'est relancée (st.rerun) que lorsque le modèle doit changer.
+# -----------------------
+@st.fragment
+def vm_controls():
+    st.subheader("Campagne VM (relance de confiance, profil 10 mois)")
+    vm_select = st.slider("Mois de la campagne VM", 0, st.session_state.horizon, min(6, st.session_state.horizon), 1)
+    if st.button("Lancer une campagne VM"):
+        st.session_state.vm_month = int(vm_select)
+        st.rerun()
+
+@st.fragment
+def extension_controls():
+    st.subheader("Extension (+12 mois, acquisition 6 mois)")
+    nb_med_new = st.slider("Nouveaux médecins à recruter (extension)", 0, 5000, 50, 1, key="nb_med_new")
+    if st.button("Ajouter +12 mois & recruter"):
+        st.session_state.horizon += EXTENSION_MONTHS
+        st.session_state.extension_active = True
+        st.session_state.nb_med_new_applied = nb_med_new
+        st.rerun()
+    # Extension déjà active : le nombre de recrues modifie le modèle
+    if st.session_state.extension_active and nb_med_new != st.session_state.nb_med_new_applied:
+        st.session_state.nb_med_new_applied = nb_med_new
+        st.rerun()
 
 # -----------------------
 # Session state defaults
@@ -73,62 +154,31 @@ if "extension_active" not in st.session_state:
 # Sidebar — paramètres
 # -----------------------
 st.sidebar.header("Paramètres")
-prix = st.sidebar.number_input("Prix du médicament (€ / patient)", min_value=0.0, value=120.0, step=5.0)
-nb_med_target = st.sidebar.slider("Médecins cible (cycle courant)", 1, 2000, 50, 1)
-pot_diag = st.sidebar.slider("Potentiel max de diagnostics / mois / médecin", 0, 100, 5, 1)
-taux_trait_pct = st.sidebar.slider("Taux de patients traités (%)", 0, 100, 40, 1)
-
-st.sidebar.divider()
-st.sidebar.subheader("Campagne VM (relance de confiance, profil 10 mois)")
-vm_select = st.sidebar.slider("Mois de la campagne VM", 0, st.session_state.horizon, min(6, st.session_state.horizon), 1)
-if st.sidebar.button("Lancer une campagne VM"):
-    st.session_state.vm_month = int(vm_select)
-
-st.sidebar.divider()
-st.sidebar.subheader("Extension (+12 mois, acquisition 6 mois)")
-nb_med_new = st.sidebar.slider("Nouveaux médecins à recruter (extension)", 0, 5000, 50, 1)
-if st.sidebar.button("Ajouter +12 mois & recruter"):
-    st.session_state.horizon += EXTENSION_MONTHS
-    st.session_state.extension_active = True
-
-# -----------------------
-# Horizon temporel
-# -----------------------
-T_end = st.session_state.horizon
-t = np.arange(0, T_end + 1)
-
-# -----------------------
-# Acquisition des médecins (sigmoïde 6 mois)
-#   Phase 1: 0 -> nb_med_target en 6 mois
-#   Phase 2 (si extension): +nb_med_new à partir de M=12, en 6 mois
-# -----------------------
-med_phase1 = sigmoid_acquisition(t, start_t=0, target_increment=nb_med_target, length=ACQ_LENGTH)
-if st.session_state.extension_active:
-    t_ext_start = 12
-    med_phase2 = sigmoid_acquisition(t, start_t=t_ext_start, target_increment=nb_med_new, length=ACQ_LENGTH)
-else:
-    med_phase2 = np.zeros_like(t, dtype=float)
-med_t = med_phase1 + med_phase2
-
-# -----------------------
-# Confiance des médecins (inversée 10 mois)
-#   Base : 1 - (t/10)^p
-#   VM   : reset, même profil sur 10 mois à partir de vm_month
-#   Confiance effective = max(base, VM)
-# -----------------------
-if st.session_state.vm_month is not None:
-    c_t = confidence_with_vm_inverted(t, vm_month=st.session_state.vm_month, T=CONF_T, p=CONF_P)
-else:
-    c_t = confidence_inverted_drop(t, T=CONF_T, p=CONF_P)
+# Formulaire : les réglages ne déclenchent qu'une seule réexécution, à la validation
+with st.sidebar.form("params"):
+    prix = st.number_input("Prix du médicament (€ / patient)", min_value=0.0, value=120.0, step=5.0)
+    nb_med_target = st.slider("Médecins cible (cycle courant)", 1, 2000, 50, 1)
+    pot_diag = st.slider("Potentiel max de diagnostics / mois / médecin", 0, 100, 5, 1)
+    taux_trait_pct = st.slider("Taux de patients traités (%)", 0, 100, 40, 1)
+    st.form_submit_button("Recalculer")
+
+with st.sidebar:
+    st.divider()
+    vm_controls()
+    st.divider()
+    extension_controls()
+# Sans extension, le nombre de recrues n'entre pas dans le modèle : fixé à 0 pour ne pas
+# créer une entrée de cache par position du curseur
+nb_med_new = st.session_state.nb_med_new if st.session_state.extension_active else 0
 
 # -----------------------
 # Calculs
 # -----------------------
-taux_trait = taux_trait_pct / 100.0
-diag_t = med_t * pot_diag * c_t
-traites_t = diag_t * taux_trait
-revenu_mensuel = traites_t * prix
-revenu_cumule = np.cumsum(revenu_mensuel)
+t, med_t, c_t, diag_t, traites_t, revenu_mensuel, revenu_cumule, table, totaux = compute_model(
+    float(prix), int(nb_med_target), int(pot_diag), int(taux_trait_pct),
+    int(st.session_state.horizon), st.session_state.vm_month,
+    bool(st.session_state.extension_active), int(nb_med_new),
+)
 
 # ROI sur 12 mois
 revenu_12m = revenu_cumule[min(12, len(revenu_cumule)-1)]
@@ -141,78 +191,48 @@ st.title("Modèle de gains – Acquisition (sigmoïde 6m) & Confiance inversée
 st.caption("Confiance : c(t)=1-(t/10)^p (p=3). Acquisition : sigmoïde 6m. Extension : +12m. ROI calculé sur 12 mois (coût 50 000 €).")
 
 c1, c2, c3, c4, c5 = st.columns(5)
-c1.metric("Médecins à T final", f"{int(round(med_t[-1])):,}".replace(",", " "))
-c2.metric("Diagnostics totaux (0–T)", f"{diag_t.sum():,.0f}".replace(",", " "))
-c3.metric("Patients traités (0–T)", f"{traites_t.sum():,.0f}".replace(",", " "))
-c4.metric("Revenu cumulé (0–T)", f"{revenu_cumule[-1]:,.0f} €".replace(",", " "))
+c1.metric("Médecins à T final", fmt_milliers(med_t[-1]))
+total_diag, total_traites, total_revenu = totaux
+c2.metric("Diagnostics totaux (0–T)", fmt_milliers(total_diag))
+c3.metric("Patients traités (0–T)", fmt_milliers(total_traites))
+c4.metric("Revenu cumulé (0–T)", fmt_milliers(total_revenu) + " €")
 if roi is not None:
     c5.metric("ROI (12 mois)", f"{roi*100:.1f} %")
 
 # -----------------------
 # Graphiques
 # -----------------------
-tab1, tab2, tab3, tab4 = st.tabs(["Médecins", "Confiance", "Revenu mensuel", "Revenu cumulé"])
-
-with tab1:
-    fig1, ax1 = plt.subplots(figsize=(9, 5))
-    ax1.plot(t, med_t, label="Médecins acquis")
-    ax1.set_title("Acquisition des médecins (sigmoïde, 6 mois)")
-    ax1.set_xlabel("Mois")
-    ax1.set_ylabel("Médecins")
-    if st.session_state.extension_active:
-        ax1.axvline(12, linestyle="--", alpha=0.7, label="Début extension (+12m)")
-    ax1.grid(True)
-    ax1.legend()
-    st.pyplot(fig1)
-
-with tab2:
-    fig2, ax2 = plt.subplots(figsize=(9, 5))
-    ax2.plot(t, c_t, label="Confiance c(t)")
-    if st.session_state.vm_month is not None:
-        ax2.axvline(st.session_state.vm_month, linestyle="--", alpha=0.7, label="Campagne VM")
-    ax2.set_title("Confiance (inversée, 10 mois)")
-    ax2.set_xlabel("Mois")
-    ax2.set_ylabel("Confiance (0–1)")
-    ax2.set_ylim(0, 1.05)
-    ax2.grid(True)
-    ax2.legend()
-    st.pyplot(fig2)
-
-with tab3:
-    fig3, ax3 = plt.subplots(figsize=(9, 5))
-    ax3.bar(t, revenu_mensuel, label="Revenu mensuel", width=0.7)
-    ax3.set_title("Revenu mensuel")
-    ax3.set_xlabel("Mois")
-    ax3.set_ylabel("€")
-    ax3.grid(True, axis="y")
-    ax3.legend()
-    st.pyplot(fig3)
-
-with tab4:
-    fig4, ax4 = plt.subplots(figsize=(9, 5))
-    ax4.plot(t, revenu_cumule, label="Revenu cumulé")
-    ax4.axvline(12, linestyle="--", alpha=0.7, label="Fin période ROI 12m")
-    ax4.set_title("Revenu cumulé")
-    ax4.set_xlabel("Mois")
-    ax4.set_ylabel("€")
-    ax4.grid(True)
-    ax4.legend()
-    st.pyplot(fig4)
+# Seule la vue sélectionnée est construite (st.tabs exécuterait les quatre)
+vue = st.radio("Vue", ["Médecins", "Confiance", "Revenu mensuel", "Revenu cumulé"],
+               horizontal=True, key="active_tab", label_visibility="collapsed")
+
+if vue == "Médecins":
+    vlines = ((12, "Début extension (+12m)"),) if st.session_state.extension_active else ()
+    chart = line_chart(table, "Médecins acquis", "Acquisition des médecins (sigmoïde, 6 mois)", vlines)
+elif vue == "Confiance":
+    vm_month = st.session_state.vm_month
+    vlines = ((vm_month, "Campagne VM"),) if vm_month is not None else ()
+    chart = line_chart(table, "Confiance c(t)", "Confiance (inversée, 10 mois)", vlines, y_domain=(0, 1.05))
+elif vue == "Revenu mensuel":
+    chart = bar_chart(table, "Revenu mensuel (€)", "Revenu mensuel")
+else:
+    chart = line_chart(table, "Revenu cumulé (€)", "Revenu cumulé", ((12, "Fin période ROI 12m"),))
+st.altair_chart(chart, width="stretch")
 
 # -----------------------
 # Tableau
 # -----------------------
 st.subheader("Détails mois par mois")
-df = pd.DataFrame({
-    "Mois": t,
-    "Médecins acquis": np.round(med_t, 2),
-    "Confiance c(t)": np.round(c_t, 3),
-    "Diagnostics": np.round(diag_t, 2),
-    "Patients traités": np.round(traites_t, 2),
-    "Revenu mensuel (€)": np.round(revenu_mensuel, 2),
-    "Revenu cumulé (€)": np.round(revenu_cumule, 2),
+# Arrondis appliqués à l'affichage uniquement
+st.dataframe(table, width="stretch", column_config={
+    "Mois": st.column_config.NumberColumn(format="%d"),
+    "Médecins acquis": st.column_config.NumberColumn(format="%.2f"),
+    "Confiance c(t)": st.column_config.NumberColumn(format="%.3f"),
+    "Diagnostics": st.column_config.NumberColumn(format="%.2f"),
+    "Patients traités": st.column_config.NumberColumn(format="%.2f"),
+    "Revenu mensuel (€)": st.column_config.NumberColumn(format="%.2f €"),
+    "Revenu cumulé (€)": st.column_config.NumberColumn(format="%.2f €"),
 })
-st.dataframe(df, use_container_width=True)
 
 st.info(
     "La confiance suit c(t)=1-(t/10)^p avec p=3 (plate au début, chute en fin). "